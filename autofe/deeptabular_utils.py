@@ -1,6 +1,7 @@
 import warnings
 from typing import List, Optional
 
+import numpy as np
 import pandas as pd
 from sklearn.exceptions import NotFittedError
 
@@ -20,8 +21,8 @@ class LabelEncoder:
     ----------
     columns_to_encode: list, Optional, default = None
         List of strings containing the names of the columns to encode. If
-        ``None`` all columns of type ``object`` in the dataframe will be label
-        encoded.
+        ``None`` all columns of type ``object`` or ``category`` in the
+        dataframe will be label encoded.
     for_transformer: bool, default = False
         Boolean indicating whether the preprocessed data will be passed to a
         transformer-based model.
@@ -69,12 +70,13 @@ class LabelEncoder:
 
         if self.columns_to_encode is None:
             self.columns_to_encode = list(
-                df_inp.select_dtypes(include=['object']).columns)
+                df_inp.select_dtypes(include=['object', 'category']).columns)
         else:
             # sanity check to make sure all categorical columns are in an adequate
             # format
             for col in self.columns_to_encode:
-                df_inp[col] = df_inp[col].astype('O')
+                if not isinstance(df_inp[col].dtype, pd.CategoricalDtype):
+                    df_inp[col] = df_inp[col].astype('O')
 
         unique_column_vals = dict()
         for c in self.columns_to_encode:
@@ -118,10 +120,11 @@ class LabelEncoder:
         # sanity check to make sure all categorical columns are in an adequate
         # format
         for col in self.columns_to_encode:  # type: ignore
-            df_inp[col] = df_inp[col].astype('O')
+            if not isinstance(df_inp[col].dtype, pd.CategoricalDtype):
+                df_inp[col] = df_inp[col].astype('O')
 
         for k, v in self.encoding_dict.items():
-            df_inp[k] = df_inp[k].apply(lambda x: v[x] if x in v.keys() else 0)
+            df_inp[k] = _encode_column(df_inp[k], v)
 
         return df_inp
 
@@ -165,10 +168,24 @@ class LabelEncoder:
         2     3  him
         """
         for k, v in self.inverse_encoding_dict.items():
-            df[k] = df[k].apply(lambda x: v[x])
+            df[k] = df[k].map(v)
         return df
 
 
+def _encode_column(col: pd.Series, encoding: dict) -> pd.Series:
+    """Encodes a column with the categorical codes computed by pandas, then
+    shifted to the values of ``encoding``, with 0 for unseen categories."""
+    categories = [c for c in encoding if not pd.isna(c)]
+    codes = pd.Categorical(col, categories=categories).codes
+    # the trailing 0 is picked up by the -1 codes of the unseen categories
+    values = np.array([encoding[c] for c in categories] + [0], dtype=np.int32)
+    encoded = values[codes]
+    nan_values = [v for c, v in encoding.items() if pd.isna(c)]
+    if nan_values:
+        encoded[col.isna().to_numpy()] = nan_values[0]
+    return pd.Series(encoded, index=col.index, name=col.name)
+
+
 if __name__ == '__main__':
     import pandas as pd
     df = pd.DataFrame({'col1': [1, 2, 3], 'col2': ['me', 'you', 'him']})
@@ -1,12 +1,40 @@
+import numpy as np
 import pandas as pd
 from catboost import CatBoostClassifier, CatBoostRegressor
 from lightgbm.sklearn import LGBMClassifier, LGBMRegressor
+from scipy import sparse
 from sklearn.base import BaseEstimator
 from sklearn.ensemble import GradientBoostingClassifier, GradientBoostingRegressor
 from sklearn.preprocessing import OneHotEncoder
 from xgboost.sklearn import XGBClassifier, XGBRegressor
 
 
+def leaves_to_onehot(leaves, n_leaves):
+    """One-hot encodes the leaf indices of a tree ensemble.
+
+    Parameters
+    ----------
+    leaves : array-like of shape (n_samples, n_trees)
+        The index of the leaf every sample falls in, for every tree.
+
+    n_leaves : array-like of shape (n_trees, )
+        The number of leaves of every tree.
+
+    Returns
+    -------
+    X_transformed : sparse matrix of shape (n_samples, sum(n_leaves))
+        The leaves of the t-th tree are the columns following the leaves of
+        the t - 1 first trees.
+    """
+    n_samples, n_trees = leaves.shape
+    offsets = np.concatenate([[0], np.cumsum(n_leaves)])
+    cols = (leaves + offsets[:-1]).ravel()
+    rows = np.repeat(np.arange(n_samples), n_trees)
+    data = np.ones(cols.shape[0])
+    return sparse.csr_matrix((data, (rows, cols)),
+                             shape=(n_samples, offsets[-1]))
+
+
 class XGBoostFeatureTransformer(BaseEstimator):
 
     def __init__(self,
@@ -166,22 +194,25 @@ class LightGBMFeatureTransformer(BaseEstimator):
         self.categorical_feature = categorical_feature
 
     def fit(self, X, y):
-        self.fit_transform(X, y, categorical_feature=self.categorical_feature)
+        self.model = self.estimator.fit(
+            X, y, categorical_feature=self.categorical_feature)
+        leaves = self.model.predict(X, pred_leaf=True)
+        self.n_leaves_ = leaves.max(axis=0) + 1
         return self
 
-    def fit_transform(self, X, y=None, categorical_feature='auto'):
-        self.model = self.estimator.fit(X, y)
-        self.one_hot_encoder_ = OneHotEncoder(sparse=True)
-        return self.one_hot_encoder_.fit_transform(
-            self.model.predict(X, pred_leaf=True))
+    def fit_transform(self, X, y=None):
+        self.model = self.estimator.fit(
+            X, y, categorical_feature=self.categorical_feature)
+        leaves = self.model.predict(X, pred_leaf=True)
+        self.n_leaves_ = leaves.max(axis=0) + 1
+        return leaves_to_onehot(leaves, self.n_leaves_)
 
     def transform(self, X):
-        return self.one_hot_encoder_.transform(
-            self.model.predict(X, pred_leaf=True))
+        return leaves_to_onehot(
+            self.model.predict(X, pred_leaf=True), self.n_leaves_)
 
     def dense_transform(self, X, keep_original=True):
-        gbdt_leaf = self.model.predict(X, pred_leaf=True)
-        onehot_embedding = self.one_hot_encoder_.transform(gbdt_leaf).toarray()
+        onehot_embedding = self.transform(X).toarray()
         gbdt_feats_name = [
             f'{self.short_name}' + '_embed_' + str(i)
             for i in range(onehot_embedding.shape[1])
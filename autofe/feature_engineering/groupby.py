@@ -1,5 +1,9 @@
 import gc
+import itertools
 
+import pandas as pd
+from joblib import Parallel, delayed
+from pandas.api.types import is_numeric_dtype
 from scipy.stats import kurtosis, skew
 from sklearn.feature_selection import SelectKBest, mutual_info_classif, mutual_info_regression
 
@@ -7,7 +11,8 @@ from sklearn.feature_selection import SelectKBest, mutual_info_classif, mutual_i
 def get_category_columns(df, target):
     cat_col_names = []
     for col in df.columns:
-        if df[col].dtype in ['object'] and col != target:
+        if (df[col].dtype in ['object'] or isinstance(
+                df[col].dtype, pd.CategoricalDtype)) and col != target:
             cat_col_names.append(col)
     return cat_col_names
 
@@ -54,15 +59,35 @@ def groupby_generate_feature(df, target, threshold, k, methods, reserve=False):
     cat_col_names = get_candidate_categorical_feature(df, target, threshold)
     num_col_names = get_candidate_numerical_feature(df, target, k)
 
-    new_col_names = []
-    for cat_col in cat_col_names:
-        for num_col in num_col_names:
-            for method in methods:
-                new_col_name = cat_col + '_' + num_col + '_' + method
-                new_col_names.append(new_col_name)
-                df[new_col_name] = df.groupby(cat_col)[num_col].transform(
-                    method)
-                df = df.fillna(0)
+    # missing categoricals are filled with a 0 category, as the other columns,
+    # of the type of the other categories so that parquet can still write them
+    cat_fill = {
+        col: 0 if is_numeric_dtype(df[col].cat.categories) else '0'
+        for col in df.columns
+        if isinstance(df[col].dtype, pd.CategoricalDtype)
+        and df[col].isna().any()
+    }
+    df = df.assign(
+        **{
+            col: df[col].cat.add_categories(value)
+            for col, value in cat_fill.items()
+            if value not in df[col].cat.categories
+        })
+    df = df.fillna(cat_fill).fillna(0)
+    combos = list(itertools.product(cat_col_names, num_col_names, methods))
+    new_col_names = [
+        cat_col + '_' + num_col + '_' + method
+        for cat_col, num_col, method in combos
+    ]
+    # pandas releases the GIL in the groupby kernels, so threads are enough
+    n_jobs = -1 if len(combos) >= 3 else 1
+    new_cols = Parallel(
+        n_jobs=n_jobs, backend='threading')(
+            delayed(_groupby_transform)(df, cat_col, num_col, method)
+            for cat_col, num_col, method in combos)
+    if new_cols:
+        new_df = pd.concat(new_cols, axis=1, keys=new_col_names).fillna(0)
+        df = pd.concat([df, new_df], axis=1)
 
     if reserve:
         return df
@@ -70,6 +95,10 @@ def groupby_generate_feature(df, target, threshold, k, methods, reserve=False):
         return df[new_col_names]
 
 
+def _groupby_transform(df, cat_col, num_col, method):
+    return df.groupby(cat_col)[num_col].transform(method)
+
+
 def do_sum(df, group_cols, counted, agg_name):
     gp = df[group_cols +
             [counted]].groupby(group_cols)[counted].sum().reset_index().rename(
@@ -113,7 +142,6 @@ def add_features_in_group(features, df, feature_name, aggs, prefix):
 
 
 if __name__ == '__main__':
-    import pandas as pd
     from sklearn.datasets import load_iris
 
     from sklearn.feature_selection import chi2
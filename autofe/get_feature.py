@@ -3,15 +3,47 @@ import pandas as pd
 from autofe.deeptabular_utils import LabelEncoder
 from autofe.feature_engineering.gbdt_feature import LightGBMFeatureTransformer
 from autofe.feature_engineering.groupby import get_category_columns, get_numerical_columns, groupby_generate_feature
+from pandas.api.types import is_numeric_dtype
 from pytorch_widedeep import Tab2Vec
 from pytorch_widedeep.metrics import Accuracy
 from pytorch_widedeep.models import FTTransformer, Wide, WideDeep
 from pytorch_widedeep.preprocessing import TabPreprocessor, WidePreprocessor
 from pytorch_widedeep.training import Trainer
+from scipy import sparse
 from sklearn.feature_selection import SelectFromModel
 from sklearn.metrics import accuracy_score, f1_score, mean_squared_error, r2_score, roc_auc_score
 
 
+def load_total_data(train_datafile, test_datafile):
+    """Reads the train and test sets and concatenates them, the string
+    columns are read as categoricals sharing the categories of both sets.
+
+    Returns the concatenated data and the number of training samples.
+    """
+    # arrow's multithreaded parser, the columns keep numpy dtypes
+    train_data = pd.read_csv(train_datafile, engine='pyarrow')
+    test_data = pd.read_csv(test_datafile, engine='pyarrow')
+    # the string columns of either set, a column may be empty in one of them
+    cat_cols = [
+        col for col in train_data.columns
+        if any(not is_numeric_dtype(data[col])
+               for data in (train_data, test_data))
+    ]
+    # concatenating categoricals with different categories gives objects,
+    # the categories are sorted so that the dummies keep the order they have
+    # for object columns
+    for col in cat_cols:
+        dtype = pd.CategoricalDtype(
+            np.sort(
+                pd.concat([train_data[col], test_data[col]]).dropna().unique()))
+        train_data[col] = train_data[col].astype(dtype)
+        test_data[col] = test_data[col].astype(dtype)
+    total_data = pd.concat([train_data, test_data],
+                           ignore_index=True,
+                           copy=False)
+    return total_data, len(train_data)
+
+
 def get_baseline_total_data(df):
     return pd.get_dummies(df).fillna(0)
 
@@ -35,7 +67,8 @@ def generate_cross_feature(df: pd.DataFrame, crossed_cols, keep_all=True):
         for c in cols:
             df_cc[c] = df_cc[c].astype('str')
         colname = '_'.join(cols)
-        df_cc[colname] = df_cc[list(cols)].apply(lambda x: '_'.join(x), axis=1)
+        df_cc[colname] = df_cc[cols[0]].str.cat(
+            [df_cc[c] for c in cols[1:]], sep='_')
 
         crossed_colnames.append(colname)
     if keep_all:
@@ -187,17 +220,58 @@ def select_feature(df, target_name, estimator):
     return total_data
 
 
+def quantize_features(X_train, X_test, n_bins=256):
+    """Replaces the dense float columns by the uint8 index of their quantile
+    bin, the at most ``n_bins`` bins being computed on ``X_train``. The
+    columns with missing values are kept as is, the models handle them."""
+    if n_bins > 256:
+        raise ValueError('n_bins should be at most 256, got %d' % n_bins)
+    X_train = X_train.copy()
+    X_test = X_test.copy()
+    quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+    for col in X_train.columns:
+        dtype = X_train[col].dtype
+        if isinstance(dtype, pd.SparseDtype) or dtype.kind != 'f':
+            continue
+        if X_train[col].isna().any() or X_test[col].isna().any():
+            continue
+        edges = np.unique(np.quantile(X_train[col], quantiles))
+        X_train[col] = np.digitize(X_train[col], edges).astype(np.uint8)
+        X_test[col] = np.digitize(X_test[col], edges).astype(np.uint8)
+    return X_train, X_test
+
+
+def to_model_input(X):
+    """Returns ``X`` as a CSR matrix if it has sparse columns, such as
+    sparse dummies, the dense columns coming first. Returns ``X`` as is
+    otherwise."""
+    sparse_cols = [
+        col for col in X.columns if isinstance(X[col].dtype, pd.SparseDtype)
+    ]
+    if not sparse_cols:
+        return X
+    dense = X.drop(columns=sparse_cols).to_numpy(dtype=np.float64)
+    return sparse.hstack(
+        [sparse.csr_matrix(dense), X[sparse_cols].sparse.to_coo()],
+        format='csr')
+
+
 def train_and_evaluate(total_data,
                        target_name,
                        num_train_set,
                        classifier,
-                       task_type='binary'):
+                       task_type='binary',
+                       quantize=False):
     train_data = total_data.iloc[:num_train_set]
     test_data = total_data.iloc[num_train_set:]
     X_train = train_data.drop(target_name, axis=1)
     y_train = train_data[target_name]
     X_test = test_data.drop(target_name, axis=1)
     y_test = test_data[target_name]
+    if quantize:
+        X_train, X_test = quantize_features(X_train, X_test)
+    X_train = to_model_input(X_train)
+    X_test = to_model_input(X_test)
 
     clf = classifier.fit(X_train, y_train)
     preds = clf.predict(X_test)
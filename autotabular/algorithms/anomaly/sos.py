@@ -8,28 +8,164 @@ Part of the codes are adapted from https://github.com/jeroenjanssens/scikit-sos
 from __future__ import division, print_function
 
 import numpy as np
-from numba import njit
+from numba import njit, prange
+from sklearn.metrics.pairwise import euclidean_distances
 from sklearn.utils import check_array
 from sklearn.utils.validation import check_is_fitted
 
 from .base import BaseDetector
 
 
+# the smallest data set for which the GPU beats the transfers overhead
+_GPU_MIN_SAMPLES = 4096
+
+
+def _euclidean_distances_gpu(cp, X):
+    """Computes the euclidean distance matrix of ``X`` on the GPU.
+
+    Parameters
+    ----------
+    cp : module
+        The cupy module.
+
+    X : array-like, shape (n_samples, n_features)
+        The samples.
+
+    Returns
+    -------
+    D : numpy array, shape (n_samples, n_samples)
+        The distance matrix, copied back to the host.
+    """
+    # single precision for the SGEMM throughput, on data centered in double
+    # precision on the host, as the expansion below cancels catastrophically
+    # for close samples far from the origin
+    Xc = cp.asarray(X - X.mean(axis=0), dtype=cp.float32)
+    S = Xc @ Xc.T
+    sx = (Xc * Xc).sum(axis=1)
+    S *= -2
+    S += sx[:, None]
+    S += sx[None, :]
+    cp.maximum(S, 0, out=S)
+    cp.sqrt(S, out=S)
+    return cp.asnumpy(S).astype(np.float64)
+
+
 @njit
-def _get_perplexity(D, beta):
+def _accumulate_affinities(D, shift, beta, A, start, stop):
+    """Write the affinities of ``D[start:stop]`` into ``A[start:stop]``,
+    returns their sum and the sum of their products with the dissimilarities.
+    """
+    sumA = 0.0
+    sumDA = 0.0
+    for k in range(start, stop):
+        Dk = D[k] - shift
+        A[k] = np.exp(-Dk * beta)
+        sumA += A[k]
+        sumDA += Dk * A[k]
+    return sumA, sumDA
+
+
+@njit(error_model='numpy')
+def _get_perplexity(D, shift, beta, i, A):
     """Compute the perplexity and the A-row for a specific value of the
     precision of a Gaussian distribution.
 
     Parameters
     ----------
     D : array, shape (n_samples, )
-        The dissimilarity matrix of the training samples.
+        The dissimilarities of the i-th sample to the training samples.
+
+    shift : float
+        Subtracted from the dissimilarities. The perplexity and the
+        normalized affinities do not depend on it, the smallest dissimilarity
+        keeps the exponentials from underflowing.
+
+    beta : float
+        The precision of the Gaussian distribution.
+
+    i : int
+        The index of the sample itself, which is left out of the row.
+
+    A : array, shape (n_samples, )
+        The output buffer the affinities are written to.
     """
 
-    A = np.exp(-D * beta)
-    sumA = np.sum(A)
-    H = np.log(sumA) + beta * np.sum(D * A) / sumA
-    return H, A
+    # the contiguous halves before and after the sample itself, without a
+    # branch in the loops so that they vectorize
+    sumA_head, sumDA_head = _accumulate_affinities(D, shift, beta, A, 0, i)
+    sumA_tail, sumDA_tail = _accumulate_affinities(D, shift, beta, A, i + 1,
+                                                   D.shape[0])
+    A[i] = 0.0
+    sumA = sumA_head + sumA_tail
+    sumDA = sumDA_head + sumDA_tail
+    H = np.log(sumA) + beta * sumDA / sumA
+    return H
+
+
+@njit(parallel=True, error_model='numpy', cache=True)
+def _d2a_numba(D, logU, eps, max_tries, A):
+    """Binary search of the precision of every row of ``D``, writing the
+    resulting affinities into ``A``. Rows are independent and searched in
+    parallel."""
+
+    n = D.shape[0]
+    for i in prange(n):
+        # Compute the Gaussian kernel and entropy for the current precision
+        betamin = -np.inf
+        betamax = np.inf
+        # start from the usual t-SNE guess instead of 1, which is close to the
+        # solution whatever the scale of the dissimilarities
+        beta = logU / max(np.median(D[i]), eps)
+        shift = np.inf
+        for k in range(n):
+            if k != i and D[i, k] < shift:
+                shift = D[i, k]
+        H = _get_perplexity(D[i], shift, beta, i, A[i])
+
+        # Evaluate whether the perplexity is within tolerance
+        Hdiff = H - logU
+        tries = 0
+        while (np.isnan(Hdiff) or np.abs(Hdiff) > eps) and tries < max_tries:
+            if np.isnan(Hdiff):
+                beta = beta / 10.0
+            # If not, increase or decrease precision
+            elif Hdiff > 0:
+                betamin = beta
+                if betamax == np.inf or betamax == -np.inf:
+                    beta = beta * 2.0
+                else:
+                    beta = (beta + betamax) / 2.0
+            else:
+                betamax = beta
+                if betamin == np.inf or betamin == -np.inf:
+                    beta = beta / 2.0
+                else:
+                    beta = (beta + betamin) / 2.0
+            # Recompute the values, the final row of A is set in place
+            H = _get_perplexity(D[i], shift, beta, i, A[i])
+            Hdiff = H - logU
+            tries += 1
+
+
+@njit(parallel=True, error_model='numpy', cache=True)
+def _ab2o_numba(A, Out, block_size=256):
+    """Accumulate the log of ``prod(1 - B, axis=0)`` where ``B`` is ``A``
+    normalized by its row sums. Columns are split into blocks so that every
+    thread owns its part of the output while reading ``A`` row by row."""
+
+    n, m = A.shape
+    inv_sums = np.empty(n)
+    for i in range(n):
+        inv_sums[i] = 1.0 / np.sum(A[i])
+    n_blocks = (m + block_size - 1) // block_size
+    for b in prange(n_blocks):
+        start = b * block_size
+        stop = min(start + block_size, m)
+        for i in range(n):
+            for j in range(start, stop):
+                Out[j] += np.log1p(-A[i, j] * inv_sums[i])
+    for j in range(m):
+        Out[j] = np.exp(Out[j])
 
 
 class SOS(BaseDetector):
@@ -76,6 +212,16 @@ class SOS(BaseDetector):
     eps : float, optional (default = 1e-5)
         Tolerance threshold for floating point errors.
 
+    device : str, optional (default='cpu')
+        Where the euclidean dissimilarity matrix is computed, one of 'cpu',
+        'cuda' or 'auto'. With 'cpu' it is always computed on the CPU. With
+        'cuda' it is computed on the GPU with cupy, for data sets of at
+        least 4096 samples. With 'auto' the GPU is used in the same way only
+        if cupy is installed and a GPU is available. The GPU computes in
+        single precision, which is much faster on most GPUs but puts errors
+        of up to about 1e-3 times the scale of the data on the distances of
+        close samples.
+
     Attributes
     ----------
     decision_scores_ : numpy array of shape (n_samples,)
@@ -108,18 +254,24 @@ class SOS(BaseDetector):
     >>>
     >>> clf = SOS()
     >>> clf.fit(X_train)
-    SOS(contamination=0.1, eps=1e-05, metric='euclidean', perplexity=4.5)
+    SOS(contamination=0.1, device='cpu', eps=1e-05, metric='euclidean',
+      perplexity=4.5)
     """
 
     def __init__(self,
                  contamination=0.1,
                  perplexity=4.5,
                  metric='euclidean',
-                 eps=1e-5):
+                 eps=1e-5,
+                 device='cpu'):
         super(SOS, self).__init__(contamination=contamination)
+        if device not in ('cpu', 'cuda', 'auto'):
+            raise ValueError(
+                "device should be 'cpu', 'cuda' or 'auto', got %r" % device)
         self.perplexity = perplexity
         self.metric = metric.lower()
         self.eps = eps
+        self.device = device
 
     def _x2d(self, X):
         """Computes the dissimilarity matrix of a given dataset.
@@ -145,12 +297,13 @@ class SOS(BaseDetector):
             else:
                 D = X
         elif self.metric == 'euclidean':
-            sumX = np.sum(np.square(X), 1)
-
-            # np.abs protects against extremely small negative values
-            # that may arise due to floating point arithmetic errors
-            D = np.sqrt(
-                np.abs(np.add(np.add(-2 * np.dot(X, X.T), sumX).T, sumX)))
+            cp = self._get_cupy() if n >= _GPU_MIN_SAMPLES else None
+            if cp is not None:
+                D = _euclidean_distances_gpu(cp, X)
+            else:
+                # a single gemm with in-place norm updates, clipped at zero to
+                # protect against small negative values from rounding errors
+                D = euclidean_distances(X, X)
         else:
             try:
                 from scipy.spatial import distance
@@ -163,6 +316,28 @@ class SOS(BaseDetector):
                 D = distance.squareform(distance.pdist(X, self.metric))
         return D
 
+    def _get_cupy(self):
+        """Returns the cupy module if the dissimilarities are to be computed
+        on the GPU, None otherwise.
+        """
+        if self.device == 'cpu':
+            return None
+        try:
+            import cupy as cp
+        except ImportError as err:
+            if self.device == 'cuda':
+                print(err)
+                raise ImportError(
+                    "Please install cupy if you wish to use device 'cuda'")
+            return None
+        if self.device == 'auto':
+            try:
+                if cp.cuda.runtime.getDeviceCount() == 0:
+                    return None
+            except cp.cuda.runtime.CUDARuntimeError:
+                return None
+        return cp
+
     def _d2a(self, D):
         """Performs a binary search to get affinities in such a way that each
         conditional Gaussian has the same perplexity. Then returns the
@@ -181,65 +356,15 @@ class SOS(BaseDetector):
 
         (n, _) = D.shape
         A = np.zeros((n, n))
-        beta = np.ones((n, 1))
         logU = np.log(self.perplexity)
-
-        for i in range(n):
-            # Compute the Gaussian kernel and entropy for the current precision
-            betamin = -np.inf
-            betamax = np.inf
-            Di = D[i, np.concatenate((np.r_[0:i], np.r_[i + 1:n]))]
-            (H, thisA) = _get_perplexity(Di, beta[i])
-
-            # Evaluate whether the perplexity is within tolerance
-            Hdiff = H - logU
-            tries = 0
-            while (np.isnan(Hdiff)
-                   or np.abs(Hdiff) > self.eps) and tries < 5000:
-                if np.isnan(Hdiff):
-                    beta[i] = beta[i] / 10.0
-                # If not, increase or decrease precision
-                elif Hdiff > 0:
-                    betamin = beta[i].copy()
-                    if betamax == np.inf or betamax == -np.inf:
-                        beta[i] = beta[i] * 2.0
-                    else:
-                        beta[i] = (beta[i] + betamax) / 2.0
-                else:
-                    betamax = beta[i].copy()
-                    if betamin == np.inf or betamin == -np.inf:
-                        beta[i] = beta[i] / 2.0
-                    else:
-                        beta[i] = (beta[i] + betamin) / 2.0
-                # Recompute the values
-                (H, thisA) = _get_perplexity(Di, beta[i])
-                Hdiff = H - logU
-                tries += 1
-
-            # Set the final row of A
-            A[i, np.concatenate((np.r_[0:i], np.r_[i + 1:n]))] = thisA
-
+        _d2a_numba(
+            np.ascontiguousarray(D, dtype=np.float64), logU, self.eps, 50,
+            A)
         return A
 
-    def _a2b(self, A):
-        """Computes the binding probabilities of a given affinity matrix.
-
-        Parameters
-        ----------
-        A : array, shape (n_samples, )
-            The affinities matrix.
-
-        Returns
-        -------
-        B : array, shape (n_samples, )
-            Returns the matrix of binding probabilities.
-        """
-
-        B = A / A.sum(axis=1)[:, np.newaxis]
-        return B
-
-    def _b2o(self, B):
-        """Computes the binding probabilities of a given affinity matrix.
+    def _ab2o(self, A):
+        """Computes the outlier probabilities of a given affinity matrix,
+        without materializing the matrix of binding probabilities.
 
         Parameters
         ----------
@@ -248,10 +373,11 @@ class SOS(BaseDetector):
 
         Returns
         -------
-        B : array, shape (n_samples, )
-            Returns the matrix of binding probabilities.
+        Out : array, shape (n_samples, )
+            Returns the outlier probabilities.
         """
-        Out = np.prod(1 - B, 0)
+        Out = np.zeros(A.shape[1])
+        _ab2o_numba(np.ascontiguousarray(A, dtype=np.float64), Out)
         return Out
 
     def fit(self, X, y=None):
@@ -274,8 +400,7 @@ class SOS(BaseDetector):
         self._set_n_classes(y)
         D = self._x2d(X)
         A = self._d2a(D)
-        B = self._a2b(A)
-        Out = self._b2o(B)
+        Out = self._ab2o(A)
         # Invert decision_scores_. Outliers comes with higher outlier scores
         self.decision_scores_ = Out
         self._process_decision_scores()
@@ -303,6 +428,5 @@ class SOS(BaseDetector):
         X = check_array(X)
         D = self._x2d(X)
         A = self._d2a(D)
-        B = self._a2b(A)
-        Out = self._b2o(B)
+        Out = self._ab2o(A)
         return Out
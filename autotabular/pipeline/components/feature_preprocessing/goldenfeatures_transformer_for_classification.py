@@ -1,15 +1,13 @@
-import itertools
 import time
-from multiprocessing import Pool
 
 import numpy as np
 import pandas as pd
 from autotabular.pipeline.components.base import AutotabularPreprocessingAlgorithm
 from autotabular.pipeline.constants import DENSE, UNSIGNED_DATA
 from ConfigSpace.configuration_space import ConfigurationSpace
-from sklearn.metrics import log_loss
+from numba import njit, prange
+from sklearn.feature_selection import mutual_info_classif
 from sklearn.model_selection import train_test_split
-from sklearn.tree import DecisionTreeClassifier
 
 
 class GoldenFeaturesTransformerClassification(AutotabularPreprocessingAlgorithm
@@ -54,92 +52,167 @@ class GoldenFeaturesTransformerClassification(AutotabularPreprocessingAlgorithm
         return cs
 
 
-def get_logloss_score(X_train, y_train, X_test, y_test):
-    clf = DecisionTreeClassifier(max_depth=3)
-    clf.fit(X_train, y_train)
-    pred = clf.predict_proba(X_test)
-    ll = log_loss(y_test, pred)
-    return ll
-
-
-def get_score(item):
-    col1 = item[0]
-    col2 = item[1]
-    X_train = item[2]
-    y_train = item[3]
-    X_test = item[4]
-    y_test = item[5]
-    scorer = item[6]
-
-    try:
-        x_train = np.array(X_train[col1] - X_train[col2]).reshape(-1, 1)
-        x_test = np.array(X_test[col1] - X_test[col2]).reshape(-1, 1)
-        diff_score = scorer(x_train, y_train, x_test, y_test)
-    except Exception as e:
-        diff_score = None
-        print(str(e))
-
-    try:
-        a, b = (
-            np.array(X_train[col1], dtype=float),
-            np.array(X_train[col2], dtype=float),
-        )
-        x_train = np.divide(
-            a, b, out=np.zeros_like(a), where=b != 0).reshape(-1, 1)
-        a, b = np.array(
-            X_test[col1], dtype=float), np.array(
-                X_test[col2], dtype=float)
-        x_test = np.divide(
-            a, b, out=np.zeros_like(a), where=b != 0).reshape(-1, 1)
-        ratio_1_score = scorer(x_train, y_train, x_test, y_test)
-    except Exception as e:
-        print(str(e))
-        ratio_1_score = None
-
-    try:
-        b, a = (
-            np.array(X_train[col1], dtype=float),
-            np.array(X_train[col2], dtype=float),
-        )
-        x_train = np.divide(
-            a, b, out=np.zeros_like(a), where=b != 0).reshape(-1, 1)
-        b, a = np.array(
-            X_test[col1], dtype=float), np.array(
-                X_test[col2], dtype=float)
-        x_test = np.divide(
-            a, b, out=np.zeros_like(a), where=b != 0).reshape(-1, 1)
-        ratio_2_score = scorer(x_train, y_train, x_test, y_test)
-    except Exception as e:
-        print(str(e))
-        ratio_2_score = None
-
-    try:
-        x_train = np.array(X_train[col1] + X_train[col2]).reshape(-1, 1)
-        x_test = np.array(X_test[col1] + X_test[col2]).reshape(-1, 1)
-        sum_score = scorer(x_train, y_train, x_test, y_test)
-    except Exception as e:
-        sum_score = None
-        print(str(e))
-
-    try:
-        x_train = np.array(X_train[col1] * X_train[col2]).reshape(-1, 1)
-        x_test = np.array(X_test[col1] * X_test[col2]).reshape(-1, 1)
-        multiply_score = scorer(x_train, y_train, x_test, y_test)
-    except Exception as e:
-        multiply_score = None
-        print(str(e))
-
-    return (diff_score, ratio_1_score, ratio_2_score, sum_score,
-            multiply_score)
+# the probabilities clipping of sklearn's log_loss
+_EPS = np.finfo(np.float64).eps
+
+
+@njit(cache=True)
+def _quantile_bins(x_train, x_test, max_bins):
+    """Bins a feature with one bin per distinct train value, or at most
+    ``max_bins`` bins cut at the train quantiles. Like sklearn's thresholds,
+    the edges are the midpoints between consecutive distinct train values,
+    a value equal to an edge going to the lower bin. Returns the train bins,
+    the test bins and the number of bins."""
+    values = np.unique(x_train)
+    if values.shape[0] <= max_bins:
+        upper = np.arange(1, values.shape[0])
+    else:
+        sorted_train = np.sort(x_train)
+        n = sorted_train.shape[0]
+        quantiles = np.empty(max_bins - 1)
+        for b in range(1, max_bins):
+            quantiles[b - 1] = sorted_train[(b * n) // max_bins]
+        # the index of the first distinct value of every upper bin
+        upper = np.unique(np.searchsorted(values, quantiles))
+        upper = upper[upper > 0]
+    edges = (values[upper - 1] + values[upper]) / 2
+    bins_train = np.searchsorted(edges, x_train, side='left')
+    bins_test = np.searchsorted(edges, x_test, side='left')
+    return bins_train, bins_test, edges.shape[0] + 1
+
+
+@njit(cache=True)
+def _fit_binned_tree(bins, y, n_bins, n_classes, max_depth, eps):
+    """Fits a decision tree with the gini criterion on a single binned
+    feature. The leaves are contiguous ranges of bins, so the tree is returned
+    as the (clipped) class probabilities of every bin."""
+    hist = np.zeros((n_bins, n_classes))
+    for k in range(bins.shape[0]):
+        hist[bins[k], y[k]] += 1.0
+
+    proba = np.zeros((n_bins, n_classes))
+    # the nodes to visit, as [lo, hi) bin ranges with their depth
+    max_nodes = 2**(max_depth + 1)
+    node_lo = np.empty(max_nodes, dtype=np.int64)
+    node_hi = np.empty(max_nodes, dtype=np.int64)
+    node_depth = np.empty(max_nodes, dtype=np.int64)
+    node_lo[0], node_hi[0], node_depth[0] = 0, n_bins, 0
+    top = 1
+    left = np.empty(n_classes)
+    while top > 0:
+        top -= 1
+        lo, hi, depth = node_lo[top], node_hi[top], node_depth[top]
+        counts = np.zeros(n_classes)
+        for b in range(lo, hi):
+            counts += hist[b]
+        total = counts.sum()
+
+        # n * gini = n - sum(c^2) / n, so the best split maximizes the sum of
+        # sum(c^2) / n over both children
+        best_split = -1
+        if depth < max_depth and np.max(counts) < total:
+            best_value = -1.0
+            left[:] = 0.0
+            n_left = 0.0
+            for s in range(lo + 1, hi):
+                # scalar loops, this sweep runs once per bin
+                for c in range(n_classes):
+                    left[c] += hist[s - 1, c]
+                    n_left += hist[s - 1, c]
+                n_right = total - n_left
+                if n_left == 0 or n_right == 0:
+                    continue
+                sq_left = 0.0
+                sq_right = 0.0
+                for c in range(n_classes):
+                    sq_left += left[c] * left[c]
+                    sq_right += (counts[c] - left[c]) * (counts[c] - left[c])
+                value = sq_left / n_left + sq_right / n_right
+                if value > best_value:
+                    best_value = value
+                    best_split = s
+
+        if best_split == -1:
+            # same clipping as sklearn's log_loss
+            p = np.minimum(np.maximum(counts / total, eps), 1 - eps)
+            for b in range(lo, hi):
+                proba[b] = p
+        else:
+            node_lo[top], node_hi[top] = lo, best_split
+            node_lo[top + 1], node_hi[top + 1] = best_split, hi
+            node_depth[top] = node_depth[top + 1] = depth + 1
+            top += 2
+    return proba
+
+
+@njit(parallel=True, cache=True)
+def _depth3_logloss(X_train, y_train, X_test, y_test, n_classes, max_bins):
+    """Log loss on the test samples of a depth 3 tree fitted on every single
+    column of ``X_train``. Columns with non finite values get a NaN score."""
+    n_cols = X_train.shape[1]
+    scores = np.empty(n_cols)
+    for j in prange(n_cols):
+        x_train = X_train[:, j]
+        x_test = X_test[:, j]
+        if not (np.all(np.isfinite(x_train))
+                and np.all(np.isfinite(x_test))):
+            scores[j] = np.nan
+            continue
+        bins_train, bins_test, n_bins = _quantile_bins(x_train, x_test,
+                                                       max_bins)
+        proba = _fit_binned_tree(bins_train, y_train, n_bins, n_classes, 3,
+                                 _EPS)
+        ll = 0.0
+        for k in range(bins_test.shape[0]):
+            ll -= np.log(proba[bins_test[k], y_test[k]])
+        scores[j] = ll / bins_test.shape[0]
+    return scores
+
+
+def _pair_operations(X, idx1, idx2):
+    """Computes the candidate features of the column pairs ``(idx1, idx2)``.
+
+    Returns the diff, both ratios, the sum and the product as arrays of shape
+    (n_samples, n_pairs), in the order of the scores of ``get_scores``.
+    """
+    a, b = X[:, idx1], X[:, idx2]
+    ratio_1 = np.divide(a, b, out=np.zeros_like(a), where=b != 0)
+    ratio_2 = np.divide(b, a, out=np.zeros_like(a), where=a != 0)
+    return a - b, ratio_1, ratio_2, a + b, a * b
+
+
+def get_scores(X_train, y_train, X_test, y_test, idx1, idx2, n_classes,
+               max_bins=None):
+    """Scores the five operations of every column pair ``(idx1[i],
+    idx2[i])``, returns an array of shape (n_pairs, 5) with the diff,
+    ratio_1, ratio_2, sum and multiply scores, NaN if a score failed.
+
+    A depth 3 tree is fitted on the binned candidates with a histogram
+    sweep, instead of fitting a ``DecisionTreeClassifier`` per candidate.
+    With the default ``max_bins``, one bin per train sample, the bins are
+    the distinct train values and the tree finds the same splits as
+    ``DecisionTreeClassifier(max_depth=3)``.
+    """
+    if max_bins is None:
+        max_bins = max(X_train.shape[0], 2)
+    train_blocks = _pair_operations(X_train, idx1, idx2)
+    test_blocks = _pair_operations(X_test, idx1, idx2)
+    return np.column_stack([
+        _depth3_logloss(x_train, y_train, x_test, y_test, n_classes,
+                        max_bins)
+        for x_train, x_test in zip(train_blocks, test_blocks)
+    ])
 
 
 class GoldenFeaturesTransformerOriginal(object):
 
+    MAX_PAIRS = 250000
+    PAIRS_CHUNK_SIZE = 100
+
     def __init__(self, features_count=None):
         self._new_features = []
         self._new_columns = []
         self._features_count = features_count
-        self._scorer = get_logloss_score
         self._error = None
 
     def fit(self, X, y):
@@ -155,42 +228,63 @@ class GoldenFeaturesTransformerOriginal(object):
                 'Golden Features not created. No continous features.')
 
         start_time = time.time()
-        combinations = itertools.combinations(X.columns, r=2)
-        items = [i for i in combinations]
-        if len(items) > 250000:
-            si = np.random.choice(len(items), 250000, replace=False)
-            items = [items[i] for i in si]
-
         X_train, X_test, y_train, y_test = self._subsample(X, y)
-
-        for i in range(len(items)):
-            items[i] += (X_train, y_train, X_test, y_test, self._scorer)
-
-        scores = []
-        # parallel version
-        with Pool() as p:
-            scores = p.map(get_score, items)
-        # single process version
-        # for item in items:
-        #    scores += [get_score(item)]
+        # column-major, so that the pair columns are contiguous slices
+        X_train = np.asfortranarray(X_train, dtype=np.float64)
+        X_test = np.asfortranarray(X_test, dtype=np.float64)
+
+        classes, y_codes = np.unique(
+            np.concatenate([np.asarray(y_train),
+                            np.asarray(y_test)]),
+            return_inverse=True)
+        y_train, y_test = y_codes[:len(y_train)], y_codes[len(y_train):]
+
+        columns = np.arange(X.shape[1])
+        if len(columns) * (len(columns) - 1) // 2 > self.MAX_PAIRS:
+            # too many pairs, keep all the pairs of the columns sharing the
+            # most information with the target
+            max_columns = int(np.sqrt(2 * self.MAX_PAIRS))
+            # the candidates of columns with non finite values are not
+            # scored anyway, they are ranked last
+            finite = (np.isfinite(X_train).all(axis=0)
+                      & np.isfinite(X_test).all(axis=0))
+            mi = np.full(X.shape[1], -np.inf)
+            if finite.any():
+                mi[finite] = mutual_info_classif(
+                    X_train[:, finite], y_train, random_state=1)
+            columns = np.sort(np.argsort(-mi, kind='stable')[:max_columns])
+        # the column positions of every pair, in lexicographic order
+        pairs1, pairs2 = np.triu_indices(len(columns), k=1)
+        idx1, idx2 = columns[pairs1], columns[pairs2]
+        # the pairs are scored in chunks to bound the size of the candidate
+        # blocks
+        scores = [
+            get_scores(X_train, y_train, X_test, y_test,
+                       idx1[c:c + self.PAIRS_CHUNK_SIZE],
+                       idx2[c:c + self.PAIRS_CHUNK_SIZE], len(classes))
+            for c in range(0, len(idx1), self.PAIRS_CHUNK_SIZE)
+        ]
+        features1 = X.columns[idx1]
+        features2 = X.columns[idx2]
 
         if not scores:
             self._error = f'Golden Features not created. Empty scores. Input data shape: {X.shape}, {y.shape}'
             raise Exception('Golden Features not created. Empty scores.')
+        scores = np.vstack(scores)
 
         result = []
-        for i in range(len(items)):
-            if scores[i][0] is not None:
-                result += [(items[i][0], items[i][1], 'diff', scores[i][0])]
-            if scores[i][1] is not None:
-                result += [(items[i][0], items[i][1], 'ratio', scores[i][1])]
-            if scores[i][2] is not None:
-                result += [(items[i][1], items[i][0], 'ratio', scores[i][2])]
-            if scores[i][3] is not None:
-                result += [(items[i][1], items[i][0], 'sum', scores[i][3])]
-            if scores[i][4] is not None:
-                result += [(items[i][1], items[i][0], 'multiply', scores[i][4])
-                           ]
+        for i in range(len(idx1)):
+            f1, f2 = features1[i], features2[i]
+            if not np.isnan(scores[i][0]):
+                result += [(f1, f2, 'diff', scores[i][0])]
+            if not np.isnan(scores[i][1]):
+                result += [(f1, f2, 'ratio', scores[i][1])]
+            if not np.isnan(scores[i][2]):
+                result += [(f2, f1, 'ratio', scores[i][2])]
+            if not np.isnan(scores[i][3]):
+                result += [(f2, f1, 'sum', scores[i][3])]
+            if not np.isnan(scores[i][4]):
+                result += [(f2, f1, 'multiply', scores[i][4])]
 
         df = pd.DataFrame(
             result, columns=['feature1', 'feature2', 'operation', 'score'])
@@ -203,7 +297,7 @@ class GoldenFeaturesTransformerOriginal(object):
             new_cols_cnt = self._features_count
 
         print(self._features_count, new_cols_cnt)
-        self._new_features = df.head(new_cols_cnt)
+        self._new_features = df.head(new_cols_cnt).to_dict(orient='records')
 
         for new_feature in self._new_features:
             new_col = '_'.join([
@@ -219,30 +313,36 @@ class GoldenFeaturesTransformerOriginal(object):
         )
 
     def transform(self, X):
-        for new_feature in self._new_features:
-            new_col = '_'.join([
-                new_feature['feature1'],
-                new_feature['operation'],
-                new_feature['feature2'],
-            ])
-            if new_feature['operation'] == 'diff':
-                X[new_col] = X[new_feature['feature1']] - X[
-                    new_feature['feature2']]
-            elif new_feature['operation'] == 'ratio':
-                a, b = (
-                    np.array(X[new_feature['feature1']], dtype=float),
-                    np.array(X[new_feature['feature2']], dtype=float),
-                )
-                X[new_col] = np.divide(
-                    a, b, out=np.zeros_like(a), where=b != 0).reshape(-1, 1)
-            elif new_feature['operation'] == 'sum':
-                X[new_col] = X[new_feature['feature1']] + X[
-                    new_feature['feature2']]
-            elif new_feature['operation'] == 'multiply':
-                X[new_col] = X[new_feature['feature1']] * X[
-                    new_feature['feature2']]
-
-        return X
+        if not self._new_features:
+            return X
+        new_features = pd.DataFrame(self._new_features)
+        # all the new features are computed at once on the numpy values of
+        # the columns they use
+        columns = list(
+            pd.unique(new_features[['feature1', 'feature2']].values.ravel()))
+        positions = {col: i for i, col in enumerate(columns)}
+        values = X[columns].to_numpy(dtype=np.float64)
+        a = values[:, new_features['feature1'].map(positions).to_numpy()]
+        b = values[:, new_features['feature2'].map(positions).to_numpy()]
+
+        operation = new_features['operation'].to_numpy()
+        new_values = np.zeros_like(a)
+        mask = operation == 'diff'
+        new_values[:, mask] = a[:, mask] - b[:, mask]
+        mask = operation == 'ratio'
+        new_values[:, mask] = np.divide(
+            a[:, mask],
+            b[:, mask],
+            out=np.zeros_like(a[:, mask]),
+            where=b[:, mask] != 0)
+        mask = operation == 'sum'
+        new_values[:, mask] = a[:, mask] + b[:, mask]
+        mask = operation == 'multiply'
+        new_values[:, mask] = a[:, mask] * b[:, mask]
+
+        new_df = pd.DataFrame(
+            new_values, columns=self._new_columns, index=X.index)
+        return pd.concat([X, new_df], axis=1)
 
     def _subsample(self, X, y):
 
@@ -1,12 +1,12 @@
 import itertools
 import time
-from multiprocessing import Pool
 
 import numpy as np
 import pandas as pd
 from autotabular.pipeline.components.base import AutotabularPreprocessingAlgorithm
 from autotabular.pipeline.constants import DENSE, UNSIGNED_DATA
 from ConfigSpace.configuration_space import ConfigurationSpace
+from joblib import Parallel, delayed
 from sklearn.metrics import mean_squared_error
 from sklearn.model_selection import train_test_split
 from sklearn.tree import DecisionTreeRegressor
@@ -61,75 +61,34 @@ def get_regression_score(X_train, y_train, X_test, y_test):
     return ll
 
 
-def get_score(item):
-    col1 = item[0]
-    col2 = item[1]
-    X_train = item[2]
-    y_train = item[3]
-    X_test = item[4]
-    y_test = item[5]
-    scorer = item[6]
-
-    try:
-        x_train = np.array(X_train[col1] - X_train[col2]).reshape(-1, 1)
-        x_test = np.array(X_test[col1] - X_test[col2]).reshape(-1, 1)
-        diff_score = scorer(x_train, y_train, x_test, y_test)
-    except Exception as e:
-        diff_score = None
-        print(str(e))
-
-    try:
-        a, b = (
-            np.array(X_train[col1], dtype=float),
-            np.array(X_train[col2], dtype=float),
-        )
-        x_train = np.divide(
-            a, b, out=np.zeros_like(a), where=b != 0).reshape(-1, 1)
-        a, b = np.array(
-            X_test[col1], dtype=float), np.array(
-                X_test[col2], dtype=float)
-        x_test = np.divide(
-            a, b, out=np.zeros_like(a), where=b != 0).reshape(-1, 1)
-        ratio_1_score = scorer(x_train, y_train, x_test, y_test)
-    except Exception as e:
-        print(str(e))
-        ratio_1_score = None
-
-    try:
-        b, a = (
-            np.array(X_train[col1], dtype=float),
-            np.array(X_train[col2], dtype=float),
-        )
-        x_train = np.divide(
-            a, b, out=np.zeros_like(a), where=b != 0).reshape(-1, 1)
-        b, a = np.array(
-            X_test[col1], dtype=float), np.array(
-                X_test[col2], dtype=float)
-        x_test = np.divide(
-            a, b, out=np.zeros_like(a), where=b != 0).reshape(-1, 1)
-        ratio_2_score = scorer(x_train, y_train, x_test, y_test)
-    except Exception as e:
-        print(str(e))
-        ratio_2_score = None
-
-    try:
-        x_train = np.array(X_train[col1] + X_train[col2]).reshape(-1, 1)
-        x_test = np.array(X_test[col1] + X_test[col2]).reshape(-1, 1)
-        sum_score = scorer(x_train, y_train, x_test, y_test)
-    except Exception as e:
-        sum_score = None
-        print(str(e))
-
-    try:
-        x_train = np.array(X_train[col1] * X_train[col2]).reshape(-1, 1)
-        x_test = np.array(X_test[col1] * X_test[col2]).reshape(-1, 1)
-        multiply_score = scorer(x_train, y_train, x_test, y_test)
-    except Exception as e:
-        multiply_score = None
-        print(str(e))
-
-    return (diff_score, ratio_1_score, ratio_2_score, sum_score,
-            multiply_score)
+def _safe_divide(a, b):
+    return np.divide(a, b, out=np.zeros_like(a), where=b != 0)
+
+
+def get_score(col1, col2, X_train, y_train, X_test, y_test, scorer):
+    """Scores the diff, both ratios, the sum and the product of the columns
+    at positions ``col1`` and ``col2``, a score is None if it failed."""
+    a_train, b_train = X_train[:, col1], X_train[:, col2]
+    a_test, b_test = X_test[:, col1], X_test[:, col2]
+    candidates = [
+        (a_train - b_train, a_test - b_test),
+        (_safe_divide(a_train, b_train), _safe_divide(a_test, b_test)),
+        (_safe_divide(b_train, a_train), _safe_divide(b_test, a_test)),
+        (a_train + b_train, a_test + b_test),
+        (a_train * b_train, a_test * b_test),
+    ]
+
+    scores = []
+    for x_train, x_test in candidates:
+        try:
+            score = scorer(
+                x_train.reshape(-1, 1), y_train, x_test.reshape(-1, 1),
+                y_test)
+        except Exception as e:
+            score = None
+            print(str(e))
+        scores += [score]
+    return tuple(scores)
 
 
 class GoldenFeaturesTransformerOriginal(object):
@@ -154,42 +113,48 @@ class GoldenFeaturesTransformerOriginal(object):
                 'Golden Features not created. No continous features.')
 
         start_time = time.time()
-        combinations = itertools.combinations(X.columns, r=2)
-        items = [i for i in combinations]
-        if len(items) > 250000:
-            si = np.random.choice(len(items), 250000, replace=False)
-            items = [items[i] for i in si]
+        # the column positions of every pair, as one structured array
+        n_pairs = X.shape[1] * (X.shape[1] - 1) // 2
+        pairs = np.fromiter(
+            itertools.combinations(range(X.shape[1]), r=2),
+            dtype=[('col1', np.int32), ('col2', np.int32)],
+            count=n_pairs)
+        if n_pairs > 250000:
+            pairs = pairs[np.random.default_rng(1).choice(
+                n_pairs, 250000, replace=False)]
 
         X_train, X_test, y_train, y_test = self._subsample(X, y)
-
-        for i in range(len(items)):
-            items[i] += (X_train, y_train, X_test, y_test, self._scorer)
-
-        scores = []
-        # parallel version
-        with Pool() as p:
-            scores = p.map(get_score, items)
-        # single process version
-        # for item in items:
-        #    scores += [get_score(item)]
+        # plain arrays, which loky dumps once and memory maps read-only in
+        # the workers instead of pickling the data frames for every pair
+        X_train = np.asfortranarray(X_train, dtype=np.float64)
+        X_test = np.asfortranarray(X_test, dtype=np.float64)
+        y_train, y_test = np.asarray(y_train), np.asarray(y_test)
+
+        scores = Parallel(
+            n_jobs=-1, backend='loky', max_nbytes='1M', mmap_mode='r')(
+                delayed(get_score)(col1, col2, X_train, y_train, X_test,
+                                   y_test, self._scorer)
+                for col1, col2 in pairs)
+        features1 = X.columns[pairs['col1']]
+        features2 = X.columns[pairs['col2']]
 
         if not scores:
             self._error = f'Golden Features not created. Empty scores. Input data shape: {X.shape}, {y.shape}'
             raise Exception('Golden Features not created. Empty scores.')
 
         result = []
-        for i in range(len(items)):
+        for i in range(len(pairs)):
+            f1, f2 = features1[i], features2[i]
             if scores[i][0] is not None:
-                result += [(items[i][0], items[i][1], 'diff', scores[i][0])]
+                result += [(f1, f2, 'diff', scores[i][0])]
             if scores[i][1] is not None:
-                result += [(items[i][0], items[i][1], 'ratio', scores[i][1])]
+                result += [(f1, f2, 'ratio', scores[i][1])]
             if scores[i][2] is not None:
-                result += [(items[i][1], items[i][0], 'ratio', scores[i][2])]
+                result += [(f2, f1, 'ratio', scores[i][2])]
             if scores[i][3] is not None:
-                result += [(items[i][1], items[i][0], 'sum', scores[i][3])]
+                result += [(f2, f1, 'sum', scores[i][3])]
             if scores[i][4] is not None:
-                result += [(items[i][1], items[i][0], 'multiply', scores[i][4])
-                           ]
+                result += [(f2, f1, 'multiply', scores[i][4])]
 
         df = pd.DataFrame(
             result, columns=['feature1', 'feature2', 'operation', 'score'])
@@ -202,7 +167,7 @@ class GoldenFeaturesTransformerOriginal(object):
             new_cols_cnt = self._features_count
 
         print(self._features_count, new_cols_cnt)
-        self._new_features = df.head(new_cols_cnt)
+        self._new_features = df.head(new_cols_cnt).to_dict(orient='records')
 
         for new_feature in self._new_features:
             new_col = '_'.join([
@@ -218,30 +183,36 @@ class GoldenFeaturesTransformerOriginal(object):
         )
 
     def transform(self, X):
-        for new_feature in self._new_features:
-            new_col = '_'.join([
-                new_feature['feature1'],
-                new_feature['operation'],
-                new_feature['feature2'],
-            ])
-            if new_feature['operation'] == 'diff':
-                X[new_col] = X[new_feature['feature1']] - X[
-                    new_feature['feature2']]
-            elif new_feature['operation'] == 'ratio':
-                a, b = (
-                    np.array(X[new_feature['feature1']], dtype=float),
-                    np.array(X[new_feature['feature2']], dtype=float),
-                )
-                X[new_col] = np.divide(
-                    a, b, out=np.zeros_like(a), where=b != 0).reshape(-1, 1)
-            elif new_feature['operation'] == 'sum':
-                X[new_col] = X[new_feature['feature1']] + X[
-                    new_feature['feature2']]
-            elif new_feature['operation'] == 'multiply':
-                X[new_col] = X[new_feature['feature1']] * X[
-                    new_feature['feature2']]
-
-        return X
+        if not self._new_features:
+            return X
+        new_features = pd.DataFrame(self._new_features)
+        # all the new features are computed at once on the numpy values of
+        # the columns they use
+        columns = list(
+            pd.unique(new_features[['feature1', 'feature2']].values.ravel()))
+        positions = {col: i for i, col in enumerate(columns)}
+        values = X[columns].to_numpy(dtype=np.float64)
+        a = values[:, new_features['feature1'].map(positions).to_numpy()]
+        b = values[:, new_features['feature2'].map(positions).to_numpy()]
+
+        operation = new_features['operation'].to_numpy()
+        new_values = np.zeros_like(a)
+        mask = operation == 'diff'
+        new_values[:, mask] = a[:, mask] - b[:, mask]
+        mask = operation == 'ratio'
+        new_values[:, mask] = np.divide(
+            a[:, mask],
+            b[:, mask],
+            out=np.zeros_like(a[:, mask]),
+            where=b[:, mask] != 0)
+        mask = operation == 'sum'
+        new_values[:, mask] = a[:, mask] + b[:, mask]
+        mask = operation == 'multiply'
+        new_values[:, mask] = a[:, mask] * b[:, mask]
+
+        new_df = pd.DataFrame(
+            new_values, columns=self._new_columns, index=X.index)
+        return pd.concat([X, new_df], axis=1)
 
     def _subsample(self, X, y):
 
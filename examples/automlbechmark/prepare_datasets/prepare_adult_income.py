@@ -40,21 +40,19 @@ adult.to_csv(PROCESSED_DATA_DIR / 'adult_autogluon.csv', index=None)
 
 # fill na
 adult = adult.replace(to_replace=' ?', value=np.nan)
+obj_cols = adult.select_dtypes(include=['object', 'string']).columns
 fill_transformer = SimpleImputer(
     missing_values=np.nan, strategy='most_frequent')
 adult = fill_transformer.fit_transform(adult)
-adult = pd.DataFrame(adult, columns=colnames)
+adult = pd.DataFrame(adult, columns=colnames).infer_objects()
 
 # types convert
 # adult.age = adult.age.astype(float)
 # adult['hours_per_week'] = adult['hours_per_week'].astype(float)
-for c in adult.columns:
-    try:
-        adult[c] = adult[c].str.lower()
-    except AttributeError:
-        pass
+adult[obj_cols] = adult[obj_cols].apply(lambda s: s.str.lower())
 
-adult['target'] = (adult['income'].apply(lambda x: '>50' in x)).astype(int)
+adult['target'] = adult['income'].str.contains(
+    '>50', regex=False, na=False).astype(np.int8)
 adult.drop('income', axis=1, inplace=True)
 adult.drop('education_num', axis=1, inplace=True)
 
@@ -30,6 +30,25 @@ def objective(trial):
     return auc
 
 
+def fit_with_oob_early_stopping(param, X, y, step=128, tol=1e-4):
+    """Grows the forest ``step`` trees at a time, up to
+    ``param['n_estimators']`` trees, until the out-of-bag score improves by
+    less than ``tol``."""
+    max_estimators = param['n_estimators']
+    clf = RandomForestClassifier(
+        **dict(param, n_estimators=min(step, max_estimators)),
+        warm_start=True,
+        oob_score=True)
+    clf.fit(X, y)
+    while clf.n_estimators < max_estimators:
+        best_score = clf.oob_score_
+        clf.n_estimators = min(clf.n_estimators + step, max_estimators)
+        clf.fit(X, y)
+        if clf.oob_score_ - best_score < tol:
+            break
+    return clf
+
+
 if __name__ == '__main__':
     root_path = './data/processed_data/bank_marketing/'
     train_data = pd.read_csv(root_path + 'train_data.csv')
@@ -69,7 +88,10 @@ if __name__ == '__main__':
     X_test = test_data.drop(target_name, axis=1)
     y_test = test_data[target_name]
 
-    clf = RandomForestClassifier(**param).fit(X_train, y_train)
+    clf = fit_with_oob_early_stopping(param, X_train, y_train)
+    # the early stopped forest may be smaller than the tuned one
+    print('Number of trees (tuned / fitted): ', param['n_estimators'],
+          clf.n_estimators)
     preds = clf.predict(X_test)
     pred_prob = clf.predict_proba(X_test)[:, 1]
     acc = accuracy_score(y_test, preds)
@@ -15,7 +15,8 @@ def generate_cross_cols(self, df: pd.DataFrame, crossed_cols):
         for c in cols:
             df_cc[c] = df_cc[c].astype('str')
         colname = '_'.join(cols)
-        df_cc[colname] = df_cc[list(cols)].apply(lambda x: '-'.join(x), axis=1)
+        df_cc[colname] = df_cc[cols[0]].str.cat(
+            [df_cc[c] for c in cols[1:]], sep='-')
 
         crossed_colnames.append(colname)
     return df_cc[crossed_colnames]
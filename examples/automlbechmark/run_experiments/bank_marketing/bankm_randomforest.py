@@ -1,13 +1,15 @@
 import os
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 from autofe.deeptabular_utils import LabelEncoder
 from autofe.feature_engineering.groupby import get_category_columns
 from autofe.get_feature import (generate_cross_feature,
                                 get_baseline_total_data, get_cross_columns,
                                 get_groupby_GBDT_total_data,
-                                get_groupby_total_data, train_and_evaluate)
+                                get_groupby_total_data, load_total_data,
+                                train_and_evaluate)
 from sklearn.ensemble import RandomForestClassifier
 
 SEED = 42
@@ -22,64 +24,70 @@ if __name__ == '__main__':
     train_datafile = PROCESSED_DATA_DIR / 'train_data.csv'
     test_datafile = PROCESSED_DATA_DIR / 'test_data.csv'
 
-    train_data = pd.read_csv(PROCESSED_DATA_DIR / 'train_data.csv')
-    test_data = pd.read_csv(PROCESSED_DATA_DIR / 'test_data.csv')
-
-    len_train = len(train_data)
-    total_data = pd.concat([train_data, test_data]).reset_index(drop=True)
+    total_data, len_train = load_total_data(train_datafile, test_datafile)
 
     target_name = 'target'
-    # random forest
-    classfier = RandomForestClassifier(random_state=0)
-    """RF baseline"""
+    # computed once, total_data is not modified by the runs below
+    cat_col_names = get_category_columns(total_data, target_name)
     total_data_base = get_baseline_total_data(total_data)
+    # random forest, on features quantized to 256 bins
+    classfier = RandomForestClassifier(random_state=0, n_jobs=-1)
+    """RF baseline"""
     acc, auc = train_and_evaluate(total_data_base, target_name, len_train,
-                                  classfier)
+                                  classfier, quantize=True)
     """RF baseline_labelencoder"""
-    cat_col_names = get_category_columns(total_data, target_name)
     label_encoder = LabelEncoder(cat_col_names)
     total_data_labelencoder = label_encoder.fit_transform(total_data)
     acc, auc = train_and_evaluate(total_data_labelencoder, target_name,
-                                  len_train, classfier)
+                                  len_train, classfier, quantize=True)
 
     # cross data
-    cat_col_names = get_category_columns(total_data, target_name)
     crossed_cols = get_cross_columns(cat_col_names)
     total_cross_data = generate_cross_feature(
         total_data, crossed_cols=crossed_cols)
-    cat_col_names = get_category_columns(total_cross_data, target_name)
-    label_encoder = LabelEncoder(cat_col_names)
+    cross_cat_col_names = get_category_columns(total_cross_data, target_name)
+    label_encoder = LabelEncoder(cross_cat_col_names)
     total_cross_data = label_encoder.fit_transform(total_cross_data)
     acc, auc = train_and_evaluate(total_cross_data, target_name, len_train,
-                                  classfier)
+                                  classfier, quantize=True)
     """groupby + RF"""
     threshold = 0.9
     k = 5
     methods = ['min', 'max', 'sum', 'mean', 'std', 'count']
     total_data_groupby = get_groupby_total_data(total_data, target_name,
                                                 threshold, k, methods)
-    total_data_groupby = pd.get_dummies(total_data_groupby).fillna(0)
-    total_data_groupby.to_csv(
-        PROCESSED_DATA_DIR / 'adult_groupby.csv', index=False)
+    # unlike the csv files of the other scripts, adult_groupby.parquet holds
+    # the frame before the one-hot encoding, parquet keeps the categoricals
+    total_data_groupby.to_parquet(
+        PROCESSED_DATA_DIR / 'adult_groupby.parquet',
+        compression='snappy',
+        index=False)
+    # the groupby features are already filled, the dummies are kept sparse
+    total_data_groupby = pd.get_dummies(
+        total_data_groupby, sparse=True, dtype=np.uint8)
     acc, auc = train_and_evaluate(total_data_groupby, target_name, len_train,
-                                  classfier)
+                                  classfier, quantize=True)
     """GBDT + RF"""
     groupby_data = get_groupby_total_data(total_data, target_name, threshold,
                                           k, methods)
     total_data_GBDT = get_groupby_GBDT_total_data(groupby_data, target_name)
     acc, auc = train_and_evaluate(total_data_GBDT, target_name, len_train,
-                                  classfier)
+                                  classfier, quantize=True)
 
-    # random forest
-    param = {
-        'criterion': 'gini',
-        'min_samples_leaf': 2,
-        'min_samples_split': 4,
-        'max_depth': 8,
-        'n_estimators': 1000
-    }
-    classfier = RandomForestClassifier(**param)
-    """RF baseline"""
-    total_data_base = get_baseline_total_data(total_data)
-    acc, auc = train_and_evaluate(total_data_base, target_name, len_train,
-                                  classfier)
+    # histogram gradient boosting, in place of the tuned random forest
+    # (1000 trees of depth 8), on the label encoded categoricals
+    from sklearn.experimental import enable_hist_gradient_boosting  # noqa
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    categorical_mask = [
+        col in cat_col_names for col in total_data_labelencoder.columns
+        if col != target_name
+    ]
+    classfier = HistGradientBoostingClassifier(
+        max_iter=1000,
+        max_depth=8,
+        early_stopping=True,
+        categorical_features=categorical_mask,
+        random_state=0)
+    """HistGradientBoosting baseline_labelencoder"""
+    acc, auc = train_and_evaluate(total_data_labelencoder, target_name,
+                                  len_train, classfier)
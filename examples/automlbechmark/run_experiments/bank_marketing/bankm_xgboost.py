@@ -78,6 +78,5 @@ if __name__ == '__main__':
         'n_estimators': 800
     }
     classfier = XGBClassifier(**param)
-    total_data_base = get_baseline_total_data(total_data)
     acc, auc = train_and_evaluate(total_data_base, target_name, len_train,
                                   classfier)
@@ -1,8 +1,8 @@
 from pathlib import Path
 
-import pandas as pd
+import torch
 from autofe.deeptabular_utils import LabelEncoder
-from autofe.get_feature import get_baseline_total_data, get_category_columns, train_and_evaluate
+from autofe.get_feature import get_category_columns, load_total_data, train_and_evaluate
 from xgboost import XGBClassifier
 
 if __name__ == '__main__':
@@ -12,15 +12,14 @@ if __name__ == '__main__':
     train_datafile = PROCESSED_DATA_DIR / 'train_data.csv'
     test_datafile = PROCESSED_DATA_DIR / 'test_data.csv'
 
-    train_data = pd.read_csv(PROCESSED_DATA_DIR / 'train_data.csv')
-    test_data = pd.read_csv(PROCESSED_DATA_DIR / 'test_data.csv')
-    total_data = pd.concat([train_data, test_data]).reset_index(drop=True)
-    len_train = len(train_data)
+    total_data, len_train = load_total_data(train_datafile, test_datafile)
 
     target_name = 'OutcomeType'
-    classfier = XGBClassifier(objective='multi:softprob')
+    # histogram tree construction, on the GPU when there is one
+    tree_method = 'gpu_hist' if torch.cuda.is_available() else 'hist'
+    gpu_param = {'tree_method': tree_method, 'max_bin': 256}
+    classfier = XGBClassifier(objective='multi:softprob', **gpu_param)
     """XGBClassifier baseline"""
-    total_data_base = get_baseline_total_data(total_data)
     cat_col_names = get_category_columns(total_data, target_name)
     label_encoder = LabelEncoder(cat_col_names)
     total_data_base = label_encoder.fit_transform(total_data)
@@ -30,7 +29,8 @@ if __name__ == '__main__':
         target_name,
         len_train,
         classfier,
-        task_type='multiclass')
+        task_type='multiclass',
+        quantize=True)
 
     param = {
         'subsample': 0.9691896314686848,
@@ -39,10 +39,11 @@ if __name__ == '__main__':
         'max_depth': 27,
         'n_estimators': 900
     }
-    classfier = XGBClassifier(**param)
+    classfier = XGBClassifier(**param, **gpu_param)
     acc = train_and_evaluate(
         total_data_base,
         target_name,
         len_train,
         classfier,
-        task_type='multiclass')
+        task_type='multiclass',
+        quantize=True)
@@ -14,8 +14,8 @@ if __name__ == '__main__':
     HERE = os.path.abspath(os.path.dirname(__file__))
     with open(os.path.join(HERE, 'requirements.txt')) as fp:
         install_reqs = [
-            r.rstrip() for r in fp.readlines()
-            if not r.startswith('#') and not r.startswith('git+')
+            r.strip() for r in fp
+            if r.strip() and not r.lstrip().startswith(('#', 'git+'))
         ]
 
     extras_reqs = {
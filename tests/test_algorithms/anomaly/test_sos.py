@@ -0,0 +1,87 @@
+import unittest
+
+import numpy as np
+from autotabular.algorithms.anomaly.sos import SOS, _d2a_numba
+
+
+def _reference_affinities(X, perplexity=4.5, eps=1e-5, max_tries=5000):
+    """The affinities of the original implementation, a binary search from
+    beta = 1 on the unshifted rows."""
+    n = X.shape[0]
+    sumX = np.sum(np.square(X), 1)
+    D = np.sqrt(np.abs(np.add(np.add(-2 * np.dot(X, X.T), sumX).T, sumX)))
+    A = np.zeros((n, n))
+    logU = np.log(perplexity)
+    for i in range(n):
+        Di = np.delete(D[i], i)
+        beta, betamin, betamax = 1.0, -np.inf, np.inf
+        with np.errstate(divide='ignore', invalid='ignore'):
+            thisA = np.exp(-Di * beta)
+            H = np.log(thisA.sum()) + beta * np.sum(Di * thisA) / thisA.sum()
+            Hdiff = H - logU
+            tries = 0
+            while (np.isnan(Hdiff)
+                   or np.abs(Hdiff) > eps) and tries < max_tries:
+                if np.isnan(Hdiff):
+                    beta = beta / 10.0
+                elif Hdiff > 0:
+                    betamin = beta
+                    beta = beta * 2.0 if betamax == np.inf else (
+                        beta + betamax) / 2.0
+                else:
+                    betamax = beta
+                    beta = beta / 2.0 if betamin == -np.inf else (
+                        beta + betamin) / 2.0
+                thisA = np.exp(-Di * beta)
+                H = (np.log(thisA.sum()) +
+                     beta * np.sum(Di * thisA) / thisA.sum())
+                Hdiff = H - logU
+                tries += 1
+        A[i, np.arange(n) != i] = thisA
+    return A
+
+
+def _reference_scores(A):
+    """The outlier probabilities of the original implementation."""
+    B = A / A.sum(axis=1)[:, np.newaxis]
+    return np.prod(1 - B, 0)
+
+
+def _perplexity_errors(A, perplexity):
+    P = A / A.sum(axis=1)[:, np.newaxis]
+    H = -np.sum(P * np.log(np.where(P > 0, P, 1)), axis=1)
+    return np.abs(H - np.log(perplexity))
+
+
+class SOSTest(unittest.TestCase):
+
+    def test_scores_gaussian(self):
+        X = np.random.RandomState(0).normal(size=(200, 5))
+        clf = SOS().fit(X)
+        np.testing.assert_allclose(
+            clf.decision_scores_,
+            _reference_scores(_reference_affinities(X)),
+            atol=1e-5)
+
+    def test_scores_heavy_tailed(self):
+        X = np.random.RandomState(1).standard_cauchy(size=(200, 2))
+        clf = SOS().fit(X)
+        self.assertTrue(np.isfinite(clf.decision_scores_).all())
+
+        # the original search misses the perplexity on some rows, the
+        # shifted search from the median guess reaches it on every row
+        reference = _reference_affinities(X)
+        self.assertGreater(
+            _perplexity_errors(reference, clf.perplexity).max(), clf.eps)
+        D = clf._x2d(X)
+        A = clf._d2a(D)
+        self.assertLessEqual(
+            _perplexity_errors(A, clf.perplexity).max(), clf.eps)
+        # the scores only move on the rows the original search missed
+        np.testing.assert_allclose(
+            clf.decision_scores_, _reference_scores(reference), atol=0.05)
+
+        # more tries do not change the affinities
+        A_more_tries = np.zeros_like(A)
+        _d2a_numba(D, np.log(clf.perplexity), clf.eps, 5000, A_more_tries)
+        np.testing.assert_array_equal(A, A_more_tries)
@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+from autotabular.pipeline.components.feature_preprocessing.goldenfeatures_transformer_for_classification import _pair_operations, get_scores
+from sklearn import datasets
+from sklearn.metrics import log_loss
+from sklearn.tree import DecisionTreeClassifier
+
+
+def _sklearn_scores(X_train, y_train, X_test, y_test, idx1, idx2):
+    train_blocks = _pair_operations(X_train, idx1, idx2)
+    test_blocks = _pair_operations(X_test, idx1, idx2)
+    scores = np.empty((len(idx1), 5))
+    for k, (x_train, x_test) in enumerate(zip(train_blocks, test_blocks)):
+        for j in range(len(idx1)):
+            clf = DecisionTreeClassifier(max_depth=3)
+            clf.fit(x_train[:, [j]], y_train)
+            scores[j, k] = log_loss(
+                y_test,
+                clf.predict_proba(x_test[:, [j]]),
+                labels=clf.classes_)
+    return scores
+
+
+class GoldenFeaturesScoresTest(unittest.TestCase):
+
+    def _test_scores(self, n_samples, n_classes):
+        X, y = datasets.make_classification(
+            n_samples=n_samples,
+            n_features=6,
+            n_informative=4,
+            n_classes=n_classes,
+            random_state=0)
+        # the train size of ``_subsample`` on small data sets
+        n_train = n_samples // 4
+        X_train = np.asfortranarray(X[:n_train])
+        X_test = np.asfortranarray(X[n_train:])
+        y_train, y_test = y[:n_train], y[n_train:]
+        idx1, idx2 = np.triu_indices(X.shape[1], k=1)
+
+        scores = get_scores(X_train, y_train, X_test, y_test, idx1, idx2,
+                            n_classes)
+        expected = _sklearn_scores(X_train, y_train, X_test, y_test, idx1,
+                                   idx2)
+
+        # the trees are the same, the scores only differ by the clipping of
+        # the probabilities in older versions of log_loss and by the float32
+        # thresholds of the sklearn trees
+        np.testing.assert_allclose(scores, expected, atol=0.05)
+        self.assertEqual(
+            set(np.argsort(scores, axis=None)[:10]),
+            set(np.argsort(expected, axis=None)[:10]))
+
+    def test_scores_binary(self):
+        self._test_scores(2000, 2)
+
+    def test_scores_multiclass(self):
+        self._test_scores(2000, 3)
+
+    def test_scores_max_bins(self):
+        X, y = datasets.make_classification(
+            n_samples=20000, n_features=4, random_state=0)
+        X_train, X_test = np.asfortranarray(X[:5000]), np.asfortranarray(
+            X[5000:])
+        y_train, y_test = y[:5000], y[5000:]
+        idx1, idx2 = np.triu_indices(X.shape[1], k=1)
+
+        scores = get_scores(X_train, y_train, X_test, y_test, idx1, idx2, 2,
+                            max_bins=64)
+        expected = _sklearn_scores(X_train, y_train, X_test, y_test, idx1,
+                                   idx2)
+        # 64 bins of about 80 train samples are close to the exact splits
+        np.testing.assert_allclose(scores, expected, atol=0.2)
+
+    def test_non_finite_scores(self):
+        X, y = datasets.make_classification(
+            n_samples=400, n_features=3, n_informative=2, n_redundant=0,
+            random_state=0)
+        X[0, 0] = np.nan
+        X = np.asfortranarray(X)
+        scores = get_scores(X[:100], y[:100], X[100:], y[100:],
+                            np.array([0, 1]), np.array([1, 2]), 2)
+        self.assertTrue(np.isnan(scores[0]).all())
+        self.assertTrue(np.isfinite(scores[1]).all())
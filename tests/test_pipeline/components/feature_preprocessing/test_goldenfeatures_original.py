@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from autotabular.pipeline.components.feature_preprocessing import goldenfeatures_transformer_for_classification as classification
+from autotabular.pipeline.components.feature_preprocessing import goldenfeatures_transformer_for_regression as regression
+from sklearn import datasets
+
+
+class GoldenFeaturesTransformerOriginalTest(unittest.TestCase):
+
+    FEATURES_COUNT = 40
+
+    def _make_frame(self, X):
+        df = pd.DataFrame(X, columns=[f'f{i}' for i in range(X.shape[1])])
+        # zero divisors for the ratios
+        df.loc[::10, 'f0'] = 0
+        return df
+
+    def _test_fit_transform(self, transformer, df, y):
+        transformer.fit(df, y)
+        self.assertEqual(len(transformer._new_features), self.FEATURES_COUNT)
+
+        transformed = transformer.transform(df)
+        self.assertEqual(transformed.shape,
+                         (df.shape[0], df.shape[1] + self.FEATURES_COUNT))
+        pd.testing.assert_frame_equal(transformed[df.columns], df)
+
+        zero_divisors = 0
+        for new_feature, new_col in zip(transformer._new_features,
+                                        transformer._new_columns):
+            a = df[new_feature['feature1']]
+            b = df[new_feature['feature2']]
+            if new_feature['operation'] == 'diff':
+                expected = a - b
+            elif new_feature['operation'] == 'ratio':
+                expected = (a / b).where(b != 0, 0)
+                zero_divisors += (b == 0).sum()
+            elif new_feature['operation'] == 'sum':
+                expected = a + b
+            else:
+                self.assertEqual(new_feature['operation'], 'multiply')
+                expected = a * b
+            np.testing.assert_allclose(transformed[new_col], expected)
+        self.assertGreater(zero_divisors, 0)
+
+    def test_fit_transform_classification(self):
+        X, y = datasets.make_classification(
+            n_samples=200, n_features=5, n_informative=3, random_state=0)
+        self._test_fit_transform(
+            classification.GoldenFeaturesTransformerOriginal(
+                self.FEATURES_COUNT), self._make_frame(X), y)
+
+    def test_fit_transform_regression(self):
+        X, y = datasets.make_regression(
+            n_samples=200, n_features=5, n_informative=3, random_state=0)
+        self._test_fit_transform(
+            regression.GoldenFeaturesTransformerOriginal(self.FEATURES_COUNT),
+            self._make_frame(X), y)